@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import hashlib
+import io
+import os
+import urllib.request
 from datetime import datetime
 from ui_templates import (
     load_synapse_ui, 
@@ -9,6 +13,10 @@ from ui_templates import (
     is_token_valid_for_device,
     log_security_event
 )
+from filters import filter_row_ids, facet_options, rank_first
+from query_cache import QueryCache, filter_key
+from practice import PracticeStore, PracticeCatalogue, PracticeEngine, user_key
+from engagement import EngagementCounters, MOST_VIEWED, HARDEST
 from streamlit_gsheetsconnection import GSheetsConnection
 
 # ============================================================================
@@ -48,6 +56,19 @@ def initialize_session():
         st.session_state.selected_years = []
     if 'selected_topics' not in st.session_state:
         st.session_state.selected_topics = []
+    if 'query_key' not in st.session_state:
+        st.session_state.query_key = None
+    if 'last_impressions' not in st.session_state:
+        st.session_state.last_impressions = None
+    if 'practice_engine' not in st.session_state:
+        reset_practice()
+
+def reset_practice():
+    """Drop this session's practice queue; it is reloaded from the store on next use"""
+    st.session_state.practice_engine = None
+    st.session_state.practice_current = None
+    st.session_state.practice_feedback = None
+    st.session_state.practice_round = 0
 
 initialize_session()
 
@@ -162,6 +183,7 @@ def show_logout_button():
             st.session_state.authenticated = False
             st.session_state.token_used = None
             st.session_state.device_id = None
+            reset_practice()
             st.sidebar.success("Logged out successfully!")
             st.rerun()
 
@@ -169,15 +191,29 @@ def show_logout_button():
 # DATA LOADING & CACHING
 # ============================================================================
 
+QUESTIONS_CSV = os.environ.get(
+    "SYNAPSE_QUESTIONS_CSV",
+    "https://raw.githubusercontent.com/Imoter2233/Med_store/main/questions.csv"
+)
+
+def read_source_bytes(source):
+    """Raw bytes of a CSV given as an http(s) URL or a local path"""
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=30) as response:
+            return response.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
 @st.cache_data(ttl=300)
 def load_questions():
     """
     Load questions from GitHub CSV
     Updates every 5 minutes automatically
     """
-    CSV_URL = "https://raw.githubusercontent.com/Imoter2233/Med_store/main/questions.csv"
     try:
-        df = pd.read_csv(CSV_URL)
+        raw = read_source_bytes(QUESTIONS_CSV)
+        df = pd.read_csv(io.BytesIO(raw))
         df['year'] = df['year'].astype(str)
         
         # Data validation
@@ -186,6 +222,9 @@ def load_questions():
             if col not in df.columns:
                 df[col] = ""
         
+        # Hash of the downloaded file; cached filter results are only reused within a version
+        df.attrs['version'] = hashlib.sha256(raw).hexdigest()[:16]
+        
         return df
     except Exception as e:
         st.error(f"Failed to load questions: {str(e)[:50]}")
@@ -195,32 +234,170 @@ def load_questions():
 # FILTERING ENGINE
 # ============================================================================
 
+QUERY_CACHE_BYTES = 64 * 1024 * 1024
+# Operators set this to see hit/miss/eviction counters in the sidebar
+SHOW_CACHE_STATS = bool(os.environ.get("SYNAPSE_SHOW_CACHE_STATS"))
+
+@st.cache_resource
+def get_query_cache():
+    """Process-wide filter result cache shared by all sessions"""
+    return QueryCache(max_bytes=QUERY_CACHE_BYTES)
+
+
 def apply_filters(df):
-    """Apply all filters from sidebar"""
-    filtered = df.copy()
-    
-    # Course filter
-    if st.session_state.selected_courses:
-        filtered = filtered[filtered['course_code'].isin(st.session_state.selected_courses)]
-    
-    # Year filter
-    if st.session_state.selected_years:
-        filtered = filtered[filtered['year'].isin(st.session_state.selected_years)]
-    
-    # Topic filter
-    if st.session_state.selected_topics:
-        filtered = filtered[filtered['topic'].isin(st.session_state.selected_topics)]
-    
-    # Search filter
-    if st.session_state.search_query:
-        mask = (
-            filtered['q'].str.contains(st.session_state.search_query, case=False, na=False) |
-            filtered['topic'].str.contains(st.session_state.search_query, case=False, na=False) |
-            filtered['course_code'].str.contains(st.session_state.search_query, case=False, na=False)
-        )
-        filtered = filtered[mask]
-    
-    return filtered
+    """
+    Apply all filters from sidebar
+    Returns row positions into df; sessions with the same normalized
+    filters on the same dataset version share one cached result
+    """
+    key = filter_key(
+        df.attrs.get('version'),
+        courses=st.session_state.selected_courses,
+        years=st.session_state.selected_years,
+        topics=st.session_state.selected_topics,
+        query=st.session_state.search_query,
+    )
+    # New filter state starts from the first page of its results
+    if key != st.session_state.query_key:
+        if st.session_state.query_key is not None:
+            st.session_state.current_page = 1
+        st.session_state.query_key = key
+    _, courses, years, topics, query = key
+    return get_query_cache().get_or_compute(
+        key,
+        lambda: filter_row_ids(df, courses, years, topics, query)
+    )
+
+# ============================================================================
+# ENGAGEMENT TRACKING
+# ============================================================================
+
+ENGAGEMENT_DB_PATH = os.environ.get("SYNAPSE_ENGAGEMENT_DB", "engagement.db")
+
+SORT_OPTIONS = {
+    "Default": None,
+    "🔥 Most Viewed": MOST_VIEWED,
+    "🧩 Hardest": HARDEST,
+}
+
+@st.cache_resource
+def get_engagement():
+    """Process-wide view / reveal counters shared by all sessions"""
+    return EngagementCounters(ENGAGEMENT_DB_PATH)
+
+
+@st.cache_resource(max_entries=4)
+def get_ranked_positions(version, ranking, _df):
+    """Bank positions of a top-k ranking, resolved once per ranking refresh and dataset version"""
+    # The practice catalogue already maps this version's ids to positions
+    positions = get_practice_catalogue(version, _df).positions
+    ranked = [positions[qid] for qid in ranking if qid in positions]
+    ranked = np.array(ranked, dtype=np.int32 if len(_df) < 2**31 else np.int64)
+    ranked.flags.writeable = False
+    return ranked
+
+
+def on_answer_toggle(question_id, key):
+    """Count a reveal when an answer expander is opened (not when closed)"""
+    if st.session_state.get(key):
+        get_engagement().record_reveal(question_id)
+
+# ============================================================================
+# PRACTICE MODE
+# ============================================================================
+
+PRACTICE_DB_PATH = os.environ.get("SYNAPSE_PRACTICE_DB", "practice.db")
+
+@st.cache_resource
+def get_practice_store():
+    """Process-wide progress store shared by all sessions"""
+    return PracticeStore(PRACTICE_DB_PATH)
+
+
+@st.cache_resource(max_entries=2)
+def get_practice_catalogue(version, _df):
+    """Question ids and positions, built once per dataset version for all sessions"""
+    return PracticeCatalogue(_df['id'].astype(str).tolist())
+
+
+def get_practice_engine(df):
+    """Build this user's practice queue on first use, resuming saved progress"""
+    user = user_key(st.session_state.token_used)
+    catalogue = get_practice_catalogue(df.attrs.get('version'), df)
+    engine = st.session_state.practice_engine
+    if engine is None or engine.user != user or engine.catalogue is not catalogue:
+        st.session_state.practice_engine = PracticeEngine(user, catalogue, get_practice_store())
+        st.session_state.practice_current = None
+        st.session_state.practice_feedback = None
+    return st.session_state.practice_engine
+
+
+def render_practice(df):
+    """Serve one due or unseen question at a time and record the answer"""
+    engine = get_practice_engine(df)
+
+    if st.session_state.practice_current is None:
+        st.session_state.practice_current = engine.next_question()
+    qid = st.session_state.practice_current
+
+    if qid is not None:
+        pos = engine.catalogue.positions.get(qid)
+        if pos is None or pos >= len(df) or str(df.iloc[pos]['id']) != qid:
+            # Question bank was reloaded underneath this session
+            reset_practice()
+            st.rerun()
+
+    seen, unseen = engine.progress()
+    st.markdown(f"<small style='opacity:0.6;'>**Practised:** {seen} · **New:** {unseen}</small>", unsafe_allow_html=True)
+
+    if qid is None:
+        next_due = engine.next_due_at()
+        message = "🎉 All caught up!"
+        if next_due:
+            message += f" Next review due {datetime.fromtimestamp(next_due).strftime('%d %b %H:%M')}."
+        st.success(message)
+        return
+
+    row = df.iloc[pos]
+    render_question_card(row)
+    correct_answer = str(row.get('ans', '')).strip().upper()
+
+    choice = st.radio(
+        "Your answer",
+        ["A", "B", "C", "D"],
+        index=None,
+        horizontal=True,
+        key=f"practice_choice_{st.session_state.practice_round}",
+        disabled=st.session_state.practice_feedback is not None
+    )
+
+    if st.session_state.practice_feedback is None:
+        if st.button("✅ Submit Answer", key="practice_submit", disabled=choice is None):
+            correct = choice == correct_answer
+            engine.record_answer(qid, correct)
+            st.session_state.practice_feedback = correct
+            st.rerun()
+    else:
+        if st.session_state.practice_feedback:
+            st.success("✅ Correct!")
+        else:
+            st.error(f"❌ Incorrect. The answer is **{correct_answer}**. This question will come back soon.")
+        st.markdown(f"**Explanation:**\n\n{row.get('exp', 'No explanation available')}")
+
+        if st.button("Next Question ➡️", key="practice_next"):
+            st.session_state.practice_current = None
+            st.session_state.practice_feedback = None
+            st.session_state.practice_round += 1
+            st.rerun()
+
+
+def render_footer():
+    """Footer shown at the bottom of every view"""
+    st.markdown("---")
+    st.markdown(
+        "<small style='text-align:center; opacity:0.5;'>© 2026 Synapse Ultimate | Secure Learning Platform</small>",
+        unsafe_allow_html=True
+    )
 
 # ============================================================================
 # MAIN APPLICATION
@@ -253,12 +430,22 @@ with col2:
         unsafe_allow_html=True
     )
 
+# MODE
+st.sidebar.markdown("---")
+mode = st.sidebar.radio("Mode", ["📚 Browse", "🎯 Practice"], horizontal=True, key="app_mode")
+
+if mode == "🎯 Practice":
+    render_practice(df)
+    render_footer()
+    st.stop()
+
 # SIDEBAR FILTERS
 st.sidebar.markdown("---")
 st.sidebar.subheader("🎯 Refine Search")
 
+courses, years, topics = facet_options(df)
+
 # Course filter
-courses = sorted(df['course_code'].unique())
 st.session_state.selected_courses = st.sidebar.multiselect(
     "Select Course",
     courses,
@@ -267,7 +454,6 @@ st.session_state.selected_courses = st.sidebar.multiselect(
 )
 
 # Year filter
-years = sorted(df['year'].unique(), reverse=True)
 st.session_state.selected_years = st.sidebar.multiselect(
     "Select Year",
     years,
@@ -276,7 +462,6 @@ st.session_state.selected_years = st.sidebar.multiselect(
 )
 
 # Topic filter
-topics = sorted(df['topic'].unique())
 st.session_state.selected_topics = st.sidebar.multiselect(
     "Select Topic",
     topics,
@@ -284,6 +469,13 @@ st.session_state.selected_topics = st.sidebar.multiselect(
     key="filter_topics"
 )
 
+# Sort order
+sort_by = st.sidebar.selectbox(
+    "Sort By",
+    list(SORT_OPTIONS),
+    key="sort_order"
+)
+
 # Search
 st.markdown("### 🔍 Search Database")
 search_col1, search_col2 = st.columns([4, 1])
@@ -300,10 +492,19 @@ with search_col2:
         st.rerun()
 
 # Apply filters
-filtered_df = apply_filters(df)
+row_ids = apply_filters(df)
+
+if SHOW_CACHE_STATS:
+    with st.sidebar.expander("📊 Query Cache"):
+        st.json(get_query_cache().stats())
+
+# Engagement rankings are precomputed top-k lists, so no full sort is needed
+if SORT_OPTIONS[sort_by]:
+    ranking = get_engagement().ranking(SORT_OPTIONS[sort_by])
+    row_ids = rank_first(row_ids, get_ranked_positions(df.attrs.get('version'), ranking, df))
 
 # RESULTS INFO
-total_results = len(filtered_df)
+total_results = len(row_ids)
 st.markdown(f"<small style='opacity:0.6;'>**Found:** {total_results} question{'s' if total_results != 1 else ''}</small>", unsafe_allow_html=True)
 
 # PAGINATION
@@ -353,12 +554,25 @@ if total_results > 0:
     
     st.markdown("---")
     
+    # Count impressions once per page shown, not on every rerun
+    page_ids = df['id'].iloc[row_ids[start_idx:end_idx]].astype(str).tolist()
+    if page_ids != st.session_state.last_impressions:
+        get_engagement().record_impressions(page_ids)
+        st.session_state.last_impressions = page_ids
+    
     for idx in range(start_idx, end_idx):
-        row = filtered_df.iloc[idx]
+        row = df.iloc[row_ids[idx]]
         render_question_card(row)
         
         # Answer expandable section
-        with st.expander(f"📖 View Answer & Explanation", key=f"answer_{row.get('id', idx)}"):
+        question_id = str(row.get('id', idx))
+        answer_key = f"answer_{question_id}"
+        with st.expander(
+            f"📖 View Answer & Explanation",
+            key=answer_key,
+            on_change=on_answer_toggle,
+            args=(question_id, answer_key)
+        ):
             col1, col2 = st.columns([1, 3])
             
             with col1:
@@ -373,8 +587,4 @@ else:
     st.warning("📭 No questions match your selection. Try adjusting filters.")
 
 # FOOTER
-st.markdown("---")
-st.markdown(
-    "<small style='text-align:center; opacity:0.5;'>© 2026 Synapse Ultimate | Secure Learning Platform</small>",
-    unsafe_allow_html=True
-)
\ No newline at end of file
+render_footer()
\ No newline at end of file
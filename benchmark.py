@@ -0,0 +1,234 @@
+"""
+Microbenchmarks for the filter, search and render hot paths
+
+Times filter_row_ids(), shared query-cache hits, facet_options(),
+render_question_card() and generate_device_fingerprint() over synthetic banks with the questions.csv
+schema, records results to a JSON baseline and fails on regressions.
+
+    python benchmark.py --save bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --time-threshold 0.25
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+from unittest import mock
+
+import streamlit as st
+
+from filters import filter_row_ids, facet_options
+from query_cache import QueryCache, filter_key
+from synthetic_bank import generate_question_bank
+from ui_templates import render_question_card, generate_device_fingerprint
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+# Slowdowns within the larger of these floors are treated as timer noise,
+# on top of the configured threshold
+TIME_NOISE_FLOOR_S = 50e-6
+TIME_NOISE_FLOOR_REL = 0.10
+ALLOC_NOISE_FLOOR_BYTES = 16 * 1024
+
+# Timings per round; a round reports its fastest
+TIMINGS_PER_ROUND = 3
+
+FINGERPRINT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36",
+    "Accept-Language": "en-GB,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+
+def filter_cases(df):
+    """Representative sidebar states derived from the bank's own skew"""
+    course_counts = df['course_code'].value_counts()
+    top_course = course_counts.index[0]
+    tail_course = course_counts.index[-1]
+    latest_year = max(df['year'].unique())
+    top_topic = df.loc[df['course_code'] == top_course, 'topic'].value_counts().index[0]
+    keyword = top_topic.split()[0].lower()
+
+    return {
+        'no_filters': {},
+        'popular_course': {'courses': [top_course]},
+        'tail_course': {'courses': [tail_course]},
+        'course_and_year': {'courses': [top_course], 'years': [latest_year]},
+        'two_courses_topic': {'courses': list(course_counts.index[:2]), 'topics': [top_topic]},
+        'search_only': {'query': keyword},
+        'course_and_search': {'courses': [top_course], 'query': keyword},
+        'search_no_match': {'query': "zzzz-no-such-term"},
+    }
+
+
+def measure(fn, rounds=5, number=None):
+    """
+    Per-call timings over several rounds plus the smallest peak traced allocation
+    - number is the calls per timing; pass the baseline's to compare like with like
+    - Each round keeps the best of TIMINGS_PER_ROUND timings
+    """
+    timer = timeit.Timer(fn)
+    if number is None:
+        number, _ = timer.autorange()
+    else:
+        fn()  # warm-up
+    round_best = [
+        min(timer.repeat(repeat=TIMINGS_PER_ROUND, number=number)) / number
+        for _ in range(rounds)
+    ]
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(3):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'number': number,
+        'rounds_s': round_best,
+        'median_s': statistics.median(round_best),
+        'min_s': min(round_best),
+        'peak_alloc_bytes': max(0, min(peaks)),
+    }
+
+
+def run_suite(sizes, rounds=5, seed=0, numbers=None, log=print):
+    """Run every case; numbers maps case keys to baseline call counts"""
+    numbers = numbers or {}
+    results = {}
+
+    def run(key, fn):
+        results[key] = measure(fn, rounds, numbers.get(key))
+
+    for size in sizes:
+        start = time.perf_counter()
+        df = generate_question_bank(size, seed=seed)
+        log(f"[{size:>9,} rows] generated bank in {time.perf_counter() - start:.1f}s")
+
+        for case, kwargs in filter_cases(df).items():
+            run(f"{size}/filter_row_ids/{case}", lambda: filter_row_ids(df, **kwargs))
+
+        # Shared-cache hit for the most popular sidebar state
+        cache = QueryCache()
+        hot = filter_cases(df)['course_and_search']
+        key = filter_key("bench", **hot)
+        cache.get_or_compute(key, lambda: filter_row_ids(df, **hot))
+        run(
+            f"{size}/query_cache/hit",
+            lambda: cache.get_or_compute(filter_key("bench", **hot), lambda: filter_row_ids(df, **hot))
+        )
+
+        run(f"{size}/facet_options/sidebar", lambda: facet_options(df))
+
+        def render_page():
+            for idx in range(min(10, len(df))):
+                render_question_card(df.iloc[idx])
+
+        run(f"{size}/render_question_card/page_of_10", render_page)
+
+        for key in [k for k in results if k.startswith(f"{size}/")]:
+            r = results[key]
+            log(f"  {key.split('/', 1)[1]:<45}{r['median_s'] * 1000:>10.3f} ms{r['peak_alloc_bytes'] / 1024:>12.1f} KiB")
+
+    # Independent of bank size
+    with mock.patch.object(st, "context", SimpleNamespace(headers=FINGERPRINT_HEADERS)):
+        run("generate_device_fingerprint/headers", generate_device_fingerprint)
+    r = results["generate_device_fingerprint/headers"]
+    log(f"  {'generate_device_fingerprint/headers':<45}{r['median_s'] * 1000:>10.3f} ms{r['peak_alloc_bytes'] / 1024:>12.1f} KiB")
+
+    return results
+
+
+def compare(results, baseline, time_threshold, alloc_threshold):
+    """
+    Return human-readable regressions of results against baseline
+    - Each round's best time is checked against the baseline median, which
+      unlike the baseline minimum is not one lucky timing
+    - A slowdown counts only when more than one round exceeds the limit, so a
+      single round disturbed by other load on the machine cannot fail the run
+    """
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        noise = max(TIME_NOISE_FLOOR_S, base['median_s'] * TIME_NOISE_FLOOR_REL)
+        time_limit = base['median_s'] * (1 + time_threshold) + noise
+        slow_rounds = sum(1 for t in current['rounds_s'] if t > time_limit)
+        if slow_rounds > 1:
+            regressions.append(
+                f"{key}: time {base['median_s'] * 1000:.3f} ms -> {current['median_s'] * 1000:.3f} ms "
+                f"({slow_rounds}/{len(current['rounds_s'])} rounds over {time_limit * 1000:.3f} ms)"
+            )
+        alloc_limit = max(base['peak_alloc_bytes'] * (1 + alloc_threshold),
+                          base['peak_alloc_bytes'] + ALLOC_NOISE_FLOOR_BYTES)
+        if current['peak_alloc_bytes'] > alloc_limit:
+            regressions.append(
+                f"{key}: alloc {base['peak_alloc_bytes']} B -> {current['peak_alloc_bytes']} B"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the filter, search and render hot paths")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated bank sizes")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per case (at least 2)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--baseline", help="compare against this JSON baseline")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--alloc-threshold", type=float, default=0.10, help="allowed relative allocation growth")
+    opts = parser.parse_args(argv)
+
+    # render_question_card runs outside a script run; streamlit resets logger
+    # levels when its config loads, so drop the bare-mode warning with a filter
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage()
+    )
+
+    if opts.rounds < 2:
+        parser.error("--rounds must be at least 2")
+
+    baseline = None
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)['results']
+    numbers = {key: r['number'] for key, r in (baseline or {}).items() if 'number' in r}
+
+    sizes = [int(s) for s in opts.sizes.split(",") if s]
+    results = run_suite(sizes, rounds=opts.rounds, seed=opts.seed, numbers=numbers)
+
+    if opts.save:
+        with open(opts.save, "w") as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(results)} results to {opts.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, opts.time_threshold, opts.alloc_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {opts.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {opts.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
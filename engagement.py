@@ -0,0 +1,173 @@
+import atexit
+import itertools
+import sqlite3
+import threading
+
+MOST_VIEWED = "most_viewed"
+HARDEST = "hardest"
+
+
+class EngagementCounters:
+    """
+    In-process impression / reveal counters with periodic aggregate flushes
+    - Each script-runner thread increments its own lock-protected shard
+    - Every flush_interval the shards are drained, summed and added to
+      SQLite, so counts from several server processes merge in one table
+    - Top-k rankings are re-read after each flush and served from memory
+    """
+
+    def __init__(self, path, shards=16, flush_interval=30.0, top_k=100, min_impressions=5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.top_k = top_k
+        self.min_impressions = min_impressions
+        self.flush_errors = 0
+
+        self._shards = [(threading.Lock(), {}) for _ in range(shards)]
+        self._shard_ids = itertools.count()
+        self._local = threading.local()
+        self._flush_lock = threading.Lock()
+        self._rankings = {MOST_VIEWED: (), HARDEST: ()}
+
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS question_stats (
+                    question_id TEXT PRIMARY KEY,
+                    impressions INTEGER NOT NULL DEFAULT 0,
+                    reveals INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS question_stats_impressions ON question_stats (impressions)")
+        conn.close()
+        self._refresh_rankings()
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="engagement-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _shard(self):
+        """Shard owned by the calling thread, assigned round-robin on first use"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._shards[next(self._shard_ids) % len(self._shards)]
+            self._local.shard = shard
+        return shard
+
+    def record_impressions(self, question_ids):
+        """Count one view for each question shown on a page"""
+        lock, counts = self._shard()
+        with lock:
+            for qid in question_ids:
+                entry = counts.get(qid)
+                if entry is None:
+                    counts[qid] = [1, 0]
+                else:
+                    entry[0] += 1
+
+    def record_reveal(self, question_id):
+        """Count one opening of a question's answer"""
+        lock, counts = self._shard()
+        with lock:
+            entry = counts.get(question_id)
+            if entry is None:
+                counts[question_id] = [0, 1]
+            else:
+                entry[1] += 1
+
+    def ranking(self, kind):
+        """Top-k question ids for MOST_VIEWED or HARDEST, best first"""
+        return self._rankings.get(kind, ())
+
+    def _drain(self):
+        totals = {}
+        for lock, shard_counts in self._shards:
+            with lock:
+                if not shard_counts:
+                    continue
+                counts = dict(shard_counts)
+                shard_counts.clear()
+            for qid, (impressions, reveals) in counts.items():
+                entry = totals.get(qid)
+                if entry is None:
+                    totals[qid] = [impressions, reveals]
+                else:
+                    entry[0] += impressions
+                    entry[1] += reveals
+        return totals
+
+    def flush(self):
+        """Add pending counts to the store and refresh the rankings"""
+        with self._flush_lock:
+            totals = self._drain()
+            if totals:
+                try:
+                    conn = self._connect()
+                    try:
+                        with conn:
+                            conn.executemany(
+                                """
+                                INSERT INTO question_stats (question_id, impressions, reveals)
+                                VALUES (?, ?, ?)
+                                ON CONFLICT (question_id) DO UPDATE SET
+                                    impressions = impressions + excluded.impressions,
+                                    reveals = reveals + excluded.reveals
+                                """,
+                                [(str(qid), impressions, reveals) for qid, (impressions, reveals) in totals.items()]
+                            )
+                    finally:
+                        conn.close()
+                except sqlite3.Error:
+                    # Keep the counts for the next attempt
+                    self.flush_errors += 1
+                    lock, counts = self._shards[0]
+                    with lock:
+                        for qid, (impressions, reveals) in totals.items():
+                            entry = counts.setdefault(qid, [0, 0])
+                            entry[0] += impressions
+                            entry[1] += reveals
+                    return
+            # Refresh even without local counts to pick up other processes' flushes
+            self._refresh_rankings()
+
+    def _refresh_rankings(self):
+        try:
+            conn = self._connect()
+            try:
+                most_viewed = conn.execute(
+                    "SELECT question_id FROM question_stats ORDER BY impressions DESC LIMIT ?",
+                    (self.top_k,)
+                ).fetchall()
+                hardest = conn.execute(
+                    """
+                    SELECT question_id FROM question_stats
+                    WHERE impressions >= ?
+                    ORDER BY CAST(reveals AS REAL) / impressions DESC, impressions DESC
+                    LIMIT ?
+                    """,
+                    (self.min_impressions, self.top_k)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return
+        self._rankings = {
+            MOST_VIEWED: tuple(row[0] for row in most_viewed),
+            HARDEST: tuple(row[0] for row in hardest),
+        }
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the periodic flush and write whatever is pending"""
+        self._stop.set()
+        self.flush()
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def filter_row_ids(df, courses=(), years=(), topics=(), query=""):
+    """Positions of rows matching course, year, topic and search keywords"""
+    mask = np.ones(len(df), dtype=bool)
+
+    # Course filter
+    if courses:
+        mask &= df['course_code'].isin(courses).to_numpy()
+
+    # Year filter
+    if years:
+        mask &= df['year'].isin(years).to_numpy()
+
+    # Topic filter
+    if topics:
+        mask &= df['topic'].isin(topics).to_numpy()
+
+    row_ids = np.flatnonzero(mask)
+
+    # Search filter, only over rows that survived the sidebar filters.
+    # Keywords match literally so query normalization cannot change a pattern.
+    if query and row_ids.size:
+        candidates = df.iloc[row_ids]
+        matches = (
+            candidates['q'].str.contains(query, case=False, na=False, regex=False) |
+            candidates['topic'].str.contains(query, case=False, na=False, regex=False) |
+            candidates['course_code'].str.contains(query, case=False, na=False, regex=False)
+        )
+        row_ids = row_ids[matches.to_numpy()]
+
+    # int32 halves the footprint of cached results for banks under 2**31 rows
+    return row_ids.astype(np.int32 if len(df) < 2**31 else np.int64)
+
+
+def facet_options(df):
+    """Sorted sidebar options: (courses, years newest first, topics)"""
+    courses = sorted(df['course_code'].unique())
+    years = sorted(df['year'].unique(), reverse=True)
+    topics = sorted(df['topic'].unique())
+    return courses, years, topics
+
+
+def rank_first(row_ids, ranked_positions):
+    """
+    Reorder row positions so rows in ranked_positions come first, in ranking order
+    - ranked_positions are bank positions of a top-k ranking, best first
+    - Only membership against the short ranking is tested; the result set is never sorted
+    """
+    if len(ranked_positions) == 0 or len(row_ids) == 0:
+        return row_ids
+    is_ranked = np.isin(row_ids, ranked_positions)
+    if not is_ranked.any():
+        return row_ids
+    top = ranked_positions[np.isin(ranked_positions, row_ids[is_ranked])]
+    reordered = np.empty_like(row_ids)
+    reordered[:len(top)] = top
+    np.compress(~is_ranked, row_ids, out=reordered[len(top):])
+    return reordered
@@ -0,0 +1,421 @@
+"""
+Concurrent-session load test for app.py
+
+Starts one `streamlit run` server over a synthetic question bank and a local
+fake of the Tokens sheet, drives N scripted student sessions against it at
+once through headless websocket clients, then reports per-action latency
+percentiles, throughput and the server's peak RSS.
+
+    python load_test.py --sessions 500 --concurrency 100 --bank-size 100000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from streamlit.connections import BaseConnection
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+from synthetic_bank import generate_question_bank
+
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = str(APP_DIR / "app.py")
+
+# ============================================================================
+# FAKE TOKENS SHEET
+# ============================================================================
+
+# Loaded by the server process from LOAD_TEST_TOKENS_CSV on first read
+_tokens_sheet = None
+_tokens_lock = threading.Lock()
+
+# Shadows the real connection module on the server's PYTHONPATH
+_GSHEETS_SHIM = "from load_test import FakeGSheetsConnection as GSheetsConnection\n"
+
+
+class FakeGSheetsConnection(BaseConnection):
+    """In-process stand-in for GSheetsConnection serving the Tokens worksheet"""
+
+    def _connect(self, **kwargs):
+        return None
+
+    def read(self, worksheet=None, ttl=None, **kwargs):
+        global _tokens_sheet
+        with _tokens_lock:
+            if _tokens_sheet is None:
+                _tokens_sheet = pd.read_csv(os.environ["LOAD_TEST_TOKENS_CSV"], dtype=str).fillna("")
+            return _tokens_sheet.copy()
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        global _tokens_sheet
+        with _tokens_lock:
+            _tokens_sheet = data.copy()
+        return data
+
+
+def make_tokens(n_sessions):
+    """One unbound token per scripted session"""
+    return [f"LOADTEST-{i:06d}" for i in range(n_sessions)]
+
+# ============================================================================
+# APP SERVER
+# ============================================================================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(tmp_dir, bank_csv, tokens, timeout=60.0):
+    """
+    Run app.py under `streamlit run` with its external dependencies routed
+    to local fakes, and return (process, websocket url) once it is healthy
+    """
+    tokens_csv = os.path.join(tmp_dir, "tokens.csv")
+    pd.DataFrame({'Token': tokens, 'DeviceID': "", 'RegisteredDate': ""}).to_csv(tokens_csv, index=False)
+    with open(os.path.join(tmp_dir, "streamlit_gsheetsconnection.py"), "w") as f:
+        f.write(_GSHEETS_SHIM)
+
+    # Serve the synthetic bank and keep synthetic attempts and impressions
+    # out of the real local stores
+    env = dict(
+        os.environ,
+        SYNAPSE_QUESTIONS_CSV=bank_csv,
+        SYNAPSE_PRACTICE_DB=os.path.join(tmp_dir, "practice.db"),
+        SYNAPSE_ENGAGEMENT_DB=os.path.join(tmp_dir, "engagement.db"),
+        LOAD_TEST_TOKENS_CSV=tokens_csv,
+        PYTHONPATH=os.pathsep.join(filter(None, [tmp_dir, str(APP_DIR), os.environ.get("PYTHONPATH")])),
+    )
+    port = _free_port()
+    log_path = os.path.join(tmp_dir, "server.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", APP_PATH,
+                "--server.headless=true",
+                "--server.address=127.0.0.1",
+                f"--server.port={port}",
+                "--server.fileWatcherType=none",
+                "--browser.gatherUsageStats=false",
+            ],
+            env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process, f"ws://127.0.0.1:{port}/_stcore/stream"
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    with open(log_path) as f:
+        raise RuntimeError(f"streamlit server did not become healthy:\n{f.read()[-2000:]}")
+
+
+def stop_server(process):
+    """Stop the server and return its peak RSS in KiB and CPU seconds"""
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    # The server is this process's only child, so the children totals are its own
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is reported in KiB on Linux
+    return usage.ru_maxrss, usage.ru_utime + usage.ru_stime
+
+# ============================================================================
+# HEADLESS CLIENT
+# ============================================================================
+
+# Keyed widgets and stateful expanders get ids of the form $$ID-<hash>-<key>
+_KEYED_ID = re.compile(r"^\$\$ID-[0-9a-f]+-(.+)$")
+
+
+class HeadlessSession:
+    """
+    Browser stand-in speaking Streamlit's websocket protocol
+    - Each action sends one rerun_script BackMsg and waits for the run, and
+      any st.rerun() it triggers, to finish
+    - Only the widgets an action changes are sent; the server keeps the
+      other widgets' values from the previous run
+    - Keyed widgets of the last finished run are looked up by key
+    """
+
+    def __init__(self, websocket, timeout):
+        self._websocket = websocket
+        self.timeout = timeout
+        self.widgets = {}
+        self.exceptions = 0
+
+    def widget(self, key):
+        """Proto of the widget with this key, or None when the app did not render it"""
+        return self.widgets.get(key)
+
+    def rerun(self, *widget_states):
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        self._websocket.send(msg.SerializeToString())
+
+        self.exceptions = 0
+        widgets = {}
+        deadline = time.monotonic() + self.timeout
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(self._websocket.recv(timeout=max(0.0, deadline - time.monotonic())))
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                widgets = {}
+            elif kind == "delta":
+                self._index(fwd.delta, widgets)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.widgets = widgets
+
+    def _index(self, delta, widgets):
+        if delta.WhichOneof("type") == "new_element":
+            kind = delta.new_element.WhichOneof("type")
+            element = getattr(delta.new_element, kind)
+            if kind == "exception":
+                self.exceptions += 1
+        elif delta.WhichOneof("type") == "add_block":
+            element = delta.add_block
+        else:
+            return
+        match = _KEYED_ID.match(getattr(element, "id", ""))
+        if match:
+            widgets[match.group(1)] = element
+
+    def input_text(self, key, text):
+        self.rerun(WidgetState(id=self.widgets[key].id, string_value=text))
+
+    def select(self, key, values):
+        state = WidgetState(id=self.widgets[key].id)
+        state.string_array_value.data.extend(values)
+        self.rerun(state)
+
+    def click(self, key):
+        self.rerun(WidgetState(id=self.widgets[key].id, trigger_value=True))
+
+    def expand(self, key):
+        """Open a stateful expander, running its on_change callback like a browser would"""
+        self.rerun(WidgetState(id=self.widgets[key].id, bool_value=True))
+
+# ============================================================================
+# SCRIPTED SESSION
+# ============================================================================
+
+class _Timer:
+    """Collects wall-clock latencies per action name"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def run(self, name, session, action):
+        start = time.perf_counter()
+        action()
+        self.samples[name].append(time.perf_counter() - start)
+        if session.exceptions:
+            self.errors[name] += 1
+
+
+def run_session(args):
+    """Run one scripted student session and return its latency samples"""
+    session_idx, token, url, config = args
+    rng = random.Random(config['seed'] + session_idx)
+    timer = _Timer()
+    try:
+        with connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=config['timeout']) as websocket:
+            _script_session(HeadlessSession(websocket, config['timeout']), token, config, rng, timer)
+    except Exception:
+        # Count the failure and let the other sessions carry on
+        timer.errors["session_aborted"] += 1
+    return {'samples': dict(timer.samples), 'errors': dict(timer.errors)}
+
+
+def _script_session(session, token, config, rng, timer):
+    think = config['think_ms'] / 1000.0
+
+    def pause():
+        if think:
+            time.sleep(rng.uniform(0.5, 1.5) * think)
+
+    timer.run("initial_load", session, session.rerun)
+    pause()
+
+    timer.run("token_entry", session, lambda: session.input_text("auth_token_input", token))
+    if session.widget("filter_courses") is None:
+        timer.errors["token_entry"] += 1
+        return
+    pause()
+
+    for _ in range(config['filter_changes']):
+        courses = session.widget("filter_courses").options
+        picked = rng.sample(list(courses), k=min(len(courses), rng.randint(1, 2)))
+        timer.run("filter_change", session, lambda: session.select("filter_courses", picked))
+        pause()
+
+        years = session.widget("filter_years").options
+        if years and rng.random() < 0.5:
+            year_pick = [rng.choice(years)]
+            timer.run("filter_change", session, lambda: session.select("filter_years", year_pick))
+            pause()
+
+        for _ in range(config['pages_per_filter']):
+            # Pagination is not rendered when the filters match nothing
+            next_button = session.widget("next_page")
+            if next_button is None or next_button.disabled:
+                break
+            timer.run("pagination", session, lambda: session.click("next_page"))
+            pause()
+
+            # Opening an answer runs on_answer_toggle and records the reveal
+            answers = [key for key in session.widgets if key.startswith("answer_")]
+            for key in answers[:config['reveals_per_page']]:
+                timer.run("answer_reveal", session, lambda: session.expand(key))
+                pause()
+
+    topics = session.widget("filter_topics").options
+    for _ in range(config['searches']):
+        query = rng.choice(topics).split()[0] if topics else "question"
+        timer.run("search", session, lambda: session.input_text("search_input", query))
+        pause()
+
+    timer.run("reset_search", session, lambda: session.click("reset_search"))
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def build_report(results, wall_seconds, config, server_peak_rss_kb, server_cpu_seconds):
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for result in results:
+        for name, values in result['samples'].items():
+            samples[name].extend(values)
+        for name, count in result['errors'].items():
+            errors[name] += count
+
+    actions = {}
+    for name in set(samples) | set(errors):
+        values = sorted(samples.get(name, []))
+        actions[name] = {
+            'count': len(values),
+            'errors': errors.get(name, 0),
+            'p50_ms': percentile(values, 50) * 1000,
+            'p90_ms': percentile(values, 90) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': values[-1] * 1000 if values else 0.0,
+        }
+
+    total_actions = sum(a['count'] for a in actions.values())
+    return {
+        'config': config,
+        'wall_seconds': wall_seconds,
+        'sessions': len(results),
+        'throughput_actions_per_s': total_actions / wall_seconds if wall_seconds else 0.0,
+        'throughput_sessions_per_s': len(results) / wall_seconds if wall_seconds else 0.0,
+        'actions': actions,
+        'server_peak_rss_mb': server_peak_rss_kb / 1024,
+        'server_cpu_seconds': server_cpu_seconds,
+    }
+
+
+def print_report(report):
+    print(f"\nSessions: {report['sessions']}  Wall: {report['wall_seconds']:.1f}s  "
+          f"Throughput: {report['throughput_actions_per_s']:.1f} actions/s, "
+          f"{report['throughput_sessions_per_s']:.2f} sessions/s")
+    print(f"\n{'action':<16}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in sorted(report['actions'].items()):
+        print(f"{name:<16}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10.1f}"
+              f"{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    print(f"\nServer: peak RSS {report['server_peak_rss_mb']:.0f} MB, "
+          f"{report['server_cpu_seconds']:.1f} CPU s for {report['sessions']} sessions, "
+          f"{report['config']['concurrency']} at a time")
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py")
+    parser.add_argument("--sessions", type=int, default=50, help="total scripted sessions")
+    parser.add_argument("--concurrency", type=int, default=16, help="sessions connected at once")
+    parser.add_argument("--bank-size", type=int, default=10000, help="synthetic questions")
+    parser.add_argument("--filter-changes", type=int, default=3)
+    parser.add_argument("--pages-per-filter", type=int, default=2)
+    parser.add_argument("--reveals-per-page", type=int, default=3)
+    parser.add_argument("--searches", type=int, default=2)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between actions")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-action timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this path")
+    opts = parser.parse_args(argv)
+
+    config = {
+        'sessions': opts.sessions,
+        'concurrency': opts.concurrency,
+        'bank_size': opts.bank_size,
+        'filter_changes': opts.filter_changes,
+        'pages_per_filter': opts.pages_per_filter,
+        'reveals_per_page': opts.reveals_per_page,
+        'searches': opts.searches,
+        'think_ms': opts.think_ms,
+        'timeout': opts.timeout,
+        'seed': opts.seed,
+    }
+
+    tokens = make_tokens(opts.sessions)
+    with tempfile.TemporaryDirectory() as tmp:
+        bank_csv = os.path.join(tmp, "questions.csv")
+        generate_question_bank(opts.bank_size, seed=opts.seed).to_csv(bank_csv, index=False)
+
+        server, url = start_server(tmp, bank_csv, tokens)
+        try:
+            jobs = [(i, token, url, config) for i, token in enumerate(tokens)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(opts.concurrency) as pool:
+                results = list(pool.map(run_session, jobs))
+            wall = time.perf_counter() - start
+        finally:
+            peak_rss_kb, cpu_seconds = stop_server(server)
+
+    report = build_report(results, wall, config, peak_rss_kb, cpu_seconds)
+    print_report(report)
+    if opts.json:
+        with open(opts.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import atexit
+import hashlib
+import heapq
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+# Spaced-repetition schedule (seconds)
+RETRY_DELAY = 60
+FIRST_INTERVAL = 24 * 60 * 60
+EASE_FACTOR = 2.5
+
+_LOGGER = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _Flush:
+    """Writer sentinel; its event is set once the batch holding it is committed"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+def user_key(token):
+    """Stable per-user key; raw tokens are never written to disk"""
+    return hashlib.sha256(str(token).encode()).hexdigest()
+
+
+def next_review(interval, streak, correct, now):
+    """
+    Return (due_at, interval, streak) after an answer
+    - Wrong answers come back after RETRY_DELAY and reset the streak
+    - Correct answers start at one day and grow by EASE_FACTOR
+    """
+    if not correct:
+        return now + RETRY_DELAY, 0.0, 0
+    interval = FIRST_INTERVAL if streak == 0 else interval * EASE_FACTOR
+    return now + interval, interval, streak + 1
+
+# ============================================================================
+# PROGRESS STORE
+# ============================================================================
+
+class PracticeStore:
+    """
+    SQLite progress store with a background batching writer
+    - record() only enqueues, so answering never waits on disk
+    - The writer commits up to batch_size records per transaction
+    - A batch that fails to commit is logged and retried with the next one
+    - WAL lets sessions read schedules while the writer commits
+    """
+
+    def __init__(self, path, batch_size=200, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_errors = 0
+        self._queue = queue.Queue()
+
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS attempts (
+                    user TEXT NOT NULL,
+                    question_id TEXT NOT NULL,
+                    correct INTEGER NOT NULL,
+                    answered_at REAL NOT NULL
+                )
+            """)
+            # Nothing reads attempts by user; the index only slowed every write
+            conn.execute("DROP INDEX IF EXISTS attempts_user")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schedule (
+                    user TEXT NOT NULL,
+                    question_id TEXT NOT NULL,
+                    due_at REAL NOT NULL,
+                    interval REAL NOT NULL,
+                    streak INTEGER NOT NULL,
+                    PRIMARY KEY (user, question_id)
+                ) WITHOUT ROWID
+            """)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="practice-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints and stays corruption-safe
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, user, question_id, correct, answered_at, due_at, interval, streak):
+        """Queue an attempt and the question's new schedule for the writer"""
+        self._queue.put((user, str(question_id), int(bool(correct)), answered_at, due_at, interval, streak))
+
+    def flush(self):
+        """
+        Block until the writer has tried to commit every record queued before this call
+        Records queued afterwards by other sessions are not waited for, and
+        records whose commit failed stay queued for retry
+        """
+        if self._writer.is_alive():
+            marker = _Flush()
+            self._queue.put(marker)
+            # A marker queued behind close() is never processed; stop waiting then
+            while not marker.done.wait(0.1) and self._writer.is_alive():
+                pass
+
+    def close(self):
+        """Commit pending records and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def load_user(self, user):
+        """Return {question_id: (due_at, interval, streak)} for a single user"""
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT question_id, due_at, interval, streak FROM schedule WHERE user = ?",
+                (user,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {qid: (due_at, interval, streak) for qid, due_at, interval, streak in rows}
+
+    def _next_batch(self, timeout=None):
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not isinstance(batch[-1], _Flush) and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_loop(self):
+        conn = self._connect()
+        pending = []
+        try:
+            while True:
+                # Retry a failed batch after flush_interval even if nothing new arrives
+                batch = self._next_batch(timeout=self.flush_interval if pending else None)
+                records = pending + [item for item in batch if isinstance(item, tuple)]
+                pending = []
+                if records:
+                    try:
+                        with conn:
+                            conn.executemany(
+                                "INSERT INTO attempts (user, question_id, correct, answered_at) VALUES (?, ?, ?, ?)",
+                                [r[:4] for r in records]
+                            )
+                            conn.executemany(
+                                """
+                                INSERT INTO schedule (user, question_id, due_at, interval, streak)
+                                VALUES (?, ?, ?, ?, ?)
+                                ON CONFLICT (user, question_id) DO UPDATE SET
+                                    due_at = excluded.due_at,
+                                    interval = excluded.interval,
+                                    streak = excluded.streak
+                                """,
+                                [(r[0], r[1], r[4], r[5], r[6]) for r in records]
+                            )
+                    except sqlite3.Error:
+                        self.write_errors += 1
+                        _LOGGER.exception("Failed to write %d practice records; will retry", len(records))
+                        pending = records
+                for item in batch:
+                    if isinstance(item, _Flush):
+                        item.done.set()
+                if batch and batch[-1] is _STOP:
+                    if pending:
+                        _LOGGER.error("Dropping %d practice records that could not be written", len(pending))
+                    break
+        finally:
+            conn.close()
+
+# ============================================================================
+# PRACTICE ENGINE
+# ============================================================================
+
+class PracticeCatalogue:
+    """Question ids of one bank version, in bank order; shared read-only by all sessions"""
+
+    def __init__(self, question_ids):
+        self.question_ids = tuple(map(str, question_ids))
+        self.positions = {qid: pos for pos, qid in enumerate(self.question_ids)}
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class PracticeEngine:
+    """
+    Per-user practice queue over a shared PracticeCatalogue
+    - Reviewed questions sit in a heap ordered by next-review time
+    - Unseen questions are served in bank order once nothing is due, via a
+      cursor into the catalogue, so a session only stores its own schedule
+    - Answered questions are re-pushed; stale heap entries are skipped lazily
+    """
+
+    def __init__(self, user, catalogue, store, clock=time.time):
+        self.user = user
+        self.catalogue = catalogue
+        self.store = store
+        self.clock = clock
+
+        saved = store.load_user(user)
+        self._schedule = {qid: entry for qid, entry in saved.items() if qid in catalogue.positions}
+        self._heap = [(entry[0], qid) for qid, entry in self._schedule.items()]
+        heapq.heapify(self._heap)
+        self._cursor = 0
+
+    def _peek_due(self):
+        """Earliest valid heap entry, discarding entries superseded by later answers"""
+        while self._heap:
+            due_at, qid = self._heap[0]
+            if self._schedule[qid][0] == due_at:
+                return due_at, qid
+            heapq.heappop(self._heap)
+        return None
+
+    def next_question(self):
+        """Next question to practise, or None when nothing is due and none are unseen"""
+        top = self._peek_due()
+        if top is not None and top[0] <= self.clock():
+            return top[1]
+        question_ids = self.catalogue.question_ids
+        while self._cursor < len(question_ids) and question_ids[self._cursor] in self._schedule:
+            self._cursor += 1
+        if self._cursor < len(question_ids):
+            return question_ids[self._cursor]
+        return None
+
+    def next_due_at(self):
+        """Timestamp of the next scheduled review, or None"""
+        top = self._peek_due()
+        return top[0] if top else None
+
+    def record_answer(self, question_id, correct):
+        """Reschedule a question and hand the attempt to the store"""
+        qid = str(question_id)
+        now = self.clock()
+        _, interval, streak = self._schedule.get(qid, (0.0, 0.0, 0))
+        due_at, interval, streak = next_review(interval, streak, correct, now)
+
+        self._schedule[qid] = (due_at, interval, streak)
+        heapq.heappush(self._heap, (due_at, qid))
+        self.store.record(self.user, qid, correct, now, due_at, interval, streak)
+        return due_at
+
+    def progress(self):
+        """(questions seen, questions still unseen)"""
+        return len(self._schedule), len(self.catalogue) - len(self._schedule)
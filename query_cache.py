@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(query):
+    """Lower-case and collapse whitespace so equivalent searches share a key"""
+    return " ".join(str(query or "").split()).lower()
+
+
+def filter_key(version, courses=(), years=(), topics=(), query=""):
+    """Hashable cache key for a dataset version and sidebar filter state"""
+    return (
+        version,
+        tuple(sorted({str(c) for c in courses})),
+        tuple(sorted({str(y) for y in years})),
+        tuple(sorted({str(t) for t in topics})),
+        normalize_query(query),
+    )
+
+
+class QueryCache:
+    """
+    Process-wide LRU from filter keys to read-only arrays of row positions
+    - Bounded by the total bytes of cached arrays, not the entry count
+    - Concurrent misses on one key compute it once; other callers wait
+    - Entries larger than the whole budget are returned but not cached
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Cached row positions for key, calling compute() on a miss"""
+        while True:
+            with self._lock:
+                row_ids = self._entries.get(key)
+                if row_ids is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return row_ids
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Another session is computing this key; reuse its result
+            pending.wait()
+            with self._lock:
+                if key not in self._entries and key not in self._pending:
+                    # Too large to cache or the computation failed; compute here
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+
+        try:
+            row_ids = np.array(compute())
+            row_ids.flags.writeable = False
+            with self._lock:
+                self._store(key, row_ids)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        return row_ids
+
+    def _store(self, key, row_ids):
+        if row_ids.nbytes > self.max_bytes:
+            return
+        self._entries[key] = row_ids
+        self._bytes += row_ids.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# Course catalogue mirroring questions.csv; extra courses are generated on demand
+COURSE_TOPICS = {
+    "MTH101": ["Algebra", "Calculus", "Complex Numbers", "Coordinate Geometry", "General Math", "Logarithms", "Matrices"],
+    "PHY101": ["Dynamics", "Energy", "Gravitation", "Kinematics", "Mechanics", "Thermodynamics"],
+    "CHM101": ["Acids and Bases", "Atomic Structure", "Bonding", "Environmental Chem", "Redox", "Stoichiometry"],
+    "BIO102": ["Circulatory System", "Disease", "Nervous System", "Respiratory System"],
+    "BIO101": ["Cell Biology", "Nutrition", "Plant Biology"],
+    "PHY102": ["Electricity", "Optics"],
+    "CHM102": ["Organic Chem"],
+}
+
+COLUMNS = ['id', 'q', 'a', 'b', 'c', 'd', 'ans', 'exp', 'year', 'course_code', 'topic', 'img']
+
+
+def _zipf_weights(n, skew):
+    """Normalized Zipf weights: rank 1 is the most popular"""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def build_catalogue(n_courses=20, topics_per_course=8):
+    """
+    Return {course_code: [topics]} starting with the real catalogue
+    and padding with generated courses up to n_courses
+    """
+    catalogue = dict(list(COURSE_TOPICS.items())[:n_courses])
+    i = 0
+    while len(catalogue) < n_courses:
+        i += 1
+        code = f"GEN{100 + i}"
+        catalogue[code] = [f"{code} Topic {k + 1}" for k in range(topics_per_course)]
+    return catalogue
+
+
+def generate_question_bank(n_rows, seed=0, n_courses=20, topics_per_course=8,
+                           course_skew=1.1, topic_skew=0.9,
+                           years=("2019", "2020", "2021", "2022", "2023", "2024"),
+                           img_ratio=0.05):
+    """
+    Generate a synthetic question bank with the questions.csv schema
+    - Courses and topics within a course follow Zipf-like popularity
+    - Recent years are slightly more common than old ones
+    - Column dtypes match load_questions() (year is str)
+    """
+    rng = np.random.default_rng(seed)
+    catalogue = build_catalogue(n_courses, topics_per_course)
+    course_codes = np.array(list(catalogue.keys()), dtype=object)
+
+    course_idx = rng.choice(len(course_codes), size=n_rows, p=_zipf_weights(len(course_codes), course_skew))
+    courses = course_codes[course_idx]
+
+    topics = np.empty(n_rows, dtype=object)
+    for i, code in enumerate(course_codes):
+        rows = np.flatnonzero(course_idx == i)
+        if rows.size == 0:
+            continue
+        course_topics = np.array(catalogue[code], dtype=object)
+        pick = rng.choice(len(course_topics), size=rows.size, p=_zipf_weights(len(course_topics), topic_skew))
+        topics[rows] = course_topics[pick]
+
+    year_values = np.array(years, dtype=object)
+    year_weights = np.linspace(1.0, 2.0, len(year_values))
+    year_col = year_values[rng.choice(len(year_values), size=n_rows, p=year_weights / year_weights.sum())]
+
+    ids = np.arange(1, n_rows + 1)
+    id_str = ids.astype(str).astype(object)
+    answers = np.array(list("ABCD"), dtype=object)[rng.integers(0, 4, size=n_rows)]
+    has_img = rng.random(n_rows) < img_ratio
+
+    df = pd.DataFrame({
+        'id': ids,
+        'q': "Question " + id_str + " on " + topics + " (" + courses + "): which statement is correct?",
+        'a': "Option A for question " + id_str,
+        'b': "Option B for question " + id_str,
+        'c': "Option C for question " + id_str,
+        'd': "Option D for question " + id_str,
+        'ans': answers,
+        'exp': "Explanation for question " + id_str + " covering " + topics + ".",
+        'year': year_col,
+        'course_code': courses,
+        'topic': topics,
+        'img': np.where(has_img, "https://example.invalid/img_" + id_str + ".png", np.nan),
+    })
+    return df[COLUMNS]
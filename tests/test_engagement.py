@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+
+from engagement import HARDEST, MOST_VIEWED, EngagementCounters
+from filters import rank_first
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "engagement.db")
+
+
+def make_counters(path, **kwargs):
+    # Flush explicitly; the background flush never fires during a test
+    kwargs.setdefault("flush_interval", 3600)
+    return EngagementCounters(path, **kwargs)
+
+
+def stored(path):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT question_id, impressions, reveals FROM question_stats").fetchall()
+    finally:
+        conn.close()
+    return {qid: (impressions, reveals) for qid, impressions, reveals in rows}
+
+
+def test_flush_merges_counts_from_every_shard(db_path):
+    counters = make_counters(db_path, shards=4)
+    try:
+        def session():
+            counters.record_impressions(["q1", "q2"])
+            counters.record_reveal("q1")
+
+        threads = [threading.Thread(target=session) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sum(1 for _, counts in counters._shards if counts) == 4
+
+        counters.flush()
+        assert stored(db_path) == {"q1": (4, 4), "q2": (4, 0)}
+        assert all(not counts for _, counts in counters._shards)
+    finally:
+        counters.close()
+
+
+def test_flushes_from_two_processes_add_up(db_path):
+    first = make_counters(db_path)
+    second = make_counters(db_path)
+    try:
+        first.record_impressions(["q1", "q1", "q2"])
+        second.record_impressions(["q1"])
+        second.record_reveal("q1")
+        first.flush()
+        second.flush()
+        assert stored(db_path) == {"q1": (3, 1), "q2": (1, 0)}
+
+        # A later flush picks up the other process's counts in the rankings
+        first.flush()
+        assert first.ranking(MOST_VIEWED) == ("q1", "q2")
+    finally:
+        first.close()
+        second.close()
+
+
+def test_failed_flush_keeps_counts_for_the_next_one(db_path):
+    counters = make_counters(db_path)
+    try:
+        counters.record_impressions(["q1", "q1"])
+        counters.record_reveal("q1")
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("ALTER TABLE question_stats RENAME TO question_stats_offline")
+        conn.commit()
+        counters.flush()
+        assert counters.flush_errors == 1
+
+        conn.execute("ALTER TABLE question_stats_offline RENAME TO question_stats")
+        conn.commit()
+        conn.close()
+        counters.record_impressions(["q1"])
+        counters.flush()
+        assert stored(db_path) == {"q1": (3, 1)}
+    finally:
+        counters.close()
+
+
+def test_hardest_needs_min_impressions_and_orders_by_reveal_rate(db_path):
+    counters = make_counters(db_path, min_impressions=3)
+    try:
+        views = {"q1": (4, 3), "q2": (10, 5), "q3": (2, 2), "q4": (8, 4)}
+        for qid, (impressions, reveals) in views.items():
+            counters.record_impressions([qid] * impressions)
+            for _ in range(reveals):
+                counters.record_reveal(qid)
+        counters.flush()
+
+        # q3 has the highest rate but too few impressions; ties go to the more viewed
+        assert counters.ranking(HARDEST) == ("q1", "q2", "q4")
+        assert counters.ranking(MOST_VIEWED) == ("q2", "q4", "q1", "q3")
+    finally:
+        counters.close()
+
+
+def test_rank_first_orders_ranked_rows_then_keeps_the_rest():
+    row_ids = np.array([0, 1, 2, 3, 4], dtype=np.int32)
+    ranked = np.array([3, 1], dtype=np.int32)
+    assert rank_first(row_ids, ranked).tolist() == [3, 1, 0, 2, 4]
+
+
+def test_rank_first_ignores_ranked_rows_outside_the_result_set():
+    row_ids = np.array([0, 2, 4], dtype=np.int32)
+    assert rank_first(row_ids, np.array([1, 7, 4])).tolist() == [4, 0, 2]
+    assert rank_first(row_ids, np.array([7])).tolist() == [0, 2, 4]
+    assert rank_first(row_ids, np.array([], dtype=np.int32)).tolist() == [0, 2, 4]
+
+
+def test_rank_first_keeps_the_result_dtype():
+    row_ids = np.array([0, 2, 4], dtype=np.int32)
+    assert rank_first(row_ids, np.array([4], dtype=np.int64)).dtype == np.int32
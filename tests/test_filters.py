@@ -0,0 +1,20 @@
+import pandas as pd
+
+from filters import filter_row_ids
+
+
+def bank():
+    return pd.DataFrame({
+        'id': [10, 11, 12, 13, 14],
+        'q': ["Cell biology basics", "Cell  biology detail", "Kinematics", "Matrices (2x2)", "Redox"],
+        'course_code': ["BIO101", "BIO101", "PHY101", "MTH101", "CHM101"],
+        'topic': ["Cell Biology", "Cell Biology", "Kinematics", "Matrices", "Redox"],
+        'year': ["2023", "2024", "2024", "2022", "2023"],
+    })
+
+
+def test_search_is_literal_not_regex():
+    df = bank()
+    assert filter_row_ids(df, query="(2x2)").tolist() == [3]
+    assert filter_row_ids(df, query="cel.").tolist() == []
+    assert filter_row_ids(df, courses=["BIO101"], query="cell biology").tolist() == [0, 1]
@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+
+from practice import (
+    EASE_FACTOR,
+    FIRST_INTERVAL,
+    RETRY_DELAY,
+    PracticeCatalogue,
+    PracticeEngine,
+    PracticeStore,
+    next_review,
+)
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PracticeStore(str(tmp_path / "practice.db"), flush_interval=0.05)
+    yield store
+    store.close()
+
+
+def test_next_review_wrong_answer_retries_and_resets_streak():
+    assert next_review(FIRST_INTERVAL, 3, False, 100.0) == (100.0 + RETRY_DELAY, 0.0, 0)
+
+
+def test_next_review_correct_answers_grow_interval():
+    due_at, interval, streak = next_review(0.0, 0, True, 100.0)
+    assert (due_at, interval, streak) == (100.0 + FIRST_INTERVAL, FIRST_INTERVAL, 1)
+
+    due_at, interval, streak = next_review(interval, streak, True, 200.0)
+    assert interval == FIRST_INTERVAL * EASE_FACTOR
+    assert (due_at, streak) == (200.0 + interval, 2)
+
+
+def test_unseen_questions_served_in_bank_order(store):
+    engine = PracticeEngine("u", PracticeCatalogue(["1", "2", "3"]), store, clock=Clock())
+    assert engine.next_question() == "1"
+    engine.record_answer("1", True)
+    assert engine.next_question() == "2"
+    assert engine.progress() == (1, 2)
+
+
+def test_wrong_answer_returns_after_retry_delay(store):
+    clock = Clock()
+    engine = PracticeEngine("u", PracticeCatalogue(["1", "2", "3"]), store, clock=clock)
+    engine.record_answer("1", False)
+
+    clock.now += RETRY_DELAY - 1
+    assert engine.next_question() == "2"
+
+    clock.now += 1
+    assert engine.next_question() == "1"
+
+
+def test_stale_heap_entries_are_skipped(store):
+    clock = Clock()
+    engine = PracticeEngine("u", PracticeCatalogue(["1", "2"]), store, clock=clock)
+    engine.record_answer("1", False)
+    # Answering again supersedes the earlier retry entry for "1"
+    engine.record_answer("1", True)
+    engine.record_answer("2", True)
+
+    clock.now += RETRY_DELAY
+    assert engine.next_question() is None
+    assert engine.next_due_at() == pytest.approx(1000.0 + FIRST_INTERVAL)
+
+
+def test_resume_loads_only_that_users_rows(store):
+    clock = Clock()
+    PracticeEngine("a", PracticeCatalogue(["1", "2"]), store, clock=clock).record_answer("1", False)
+    PracticeEngine("b", PracticeCatalogue(["1", "2"]), store, clock=clock).record_answer("2", True)
+
+    assert set(store.load_user("a")) == {"1"}
+    assert set(store.load_user("b")) == {"2"}
+
+    resumed = PracticeEngine("a", PracticeCatalogue(["1", "2"]), store, clock=clock)
+    assert resumed.progress() == (1, 1)
+    clock.now += RETRY_DELAY
+    assert resumed.next_question() == "1"
+
+
+def test_failed_write_is_kept_and_retried(store):
+    conn = sqlite3.connect(store.path)
+    conn.execute("ALTER TABLE schedule RENAME TO schedule_offline")
+    conn.commit()
+    store.record("a", "1", False, 100.0, 100.0 + RETRY_DELAY, 0.0, 0)
+    store.flush()
+    assert store.write_errors >= 1
+
+    conn.execute("ALTER TABLE schedule_offline RENAME TO schedule")
+    conn.commit()
+    store.flush()
+    assert store.load_user("a") == {"1": (100.0 + RETRY_DELAY, 0.0, 0)}
+    # The attempt was rolled back with the failed batch, so it is written once
+    assert conn.execute("SELECT COUNT(*) FROM attempts").fetchone() == (1,)
+    conn.close()
+
+
+def test_existing_attempts_index_is_dropped(tmp_path):
+    path = str(tmp_path / "practice.db")
+    PracticeStore(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE INDEX attempts_user ON attempts (user, question_id)")
+    conn.commit()
+    PracticeStore(path).close()
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'attempts_user'").fetchall() == []
+    conn.close()
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from query_cache import QueryCache, filter_key
+
+
+def ids(n):
+    return np.arange(n, dtype=np.int32)
+
+
+def test_filter_key_normalizes_selection_order_and_query():
+    assert filter_key("v1", ["B", "A"], ["2024"], [], "  Cell   BIOLOGY ") == \
+        filter_key("v1", ["A", "B", "A"], ["2024"], [], "cell biology")
+    assert filter_key("v1") != filter_key("v2")
+
+
+def test_hit_returns_same_read_only_array():
+    cache = QueryCache()
+    first = cache.get_or_compute("k", lambda: ids(10))
+    second = cache.get_or_compute("k", lambda: pytest.fail("recomputed on hit"))
+
+    assert second is first
+    assert not first.flags.writeable
+    with pytest.raises(ValueError):
+        first[0] = 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction_by_bytes():
+    cache = QueryCache(max_bytes=ids(100).nbytes * 2)
+    cache.get_or_compute("a", lambda: ids(100))
+    cache.get_or_compute("b", lambda: ids(100))
+    cache.get_or_compute("a", lambda: ids(100))  # "b" is now least recently used
+    cache.get_or_compute("c", lambda: ids(100))
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert stats['bytes'] <= stats['max_bytes']
+
+    cache.get_or_compute("a", lambda: pytest.fail("'a' should still be cached"))
+    calls = []
+    cache.get_or_compute("b", lambda: calls.append(1) or ids(100))
+    assert calls == [1]
+
+
+def test_entries_over_budget_are_returned_but_not_cached():
+    cache = QueryCache(max_bytes=ids(10).nbytes)
+    result = cache.get_or_compute("big", lambda: ids(1000))
+
+    assert len(result) == 1000
+    assert not result.flags.writeable
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['bytes'] == 0
+
+
+def test_concurrent_misses_compute_once():
+    cache = QueryCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return ids(5)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+    assert cache.stats()['misses'] == 1